@@ -1,62 +1,144 @@
 import sys
 import os
 import json
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from pathlib import Path
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QLineEdit, QPushButton, QListWidget, QDateEdit, QTimeEdit,
+    QLineEdit, QPushButton, QListWidget, QListWidgetItem, QListView, QDateEdit, QTimeEdit,
     QDoubleSpinBox, QSpinBox, QMessageBox, QStackedWidget, QGroupBox,
     QFormLayout
 )
-from PyQt5.QtCore import QDate, QTime, Qt
-from PyQt5.QtGui import QFont
-from datetime import datetime, timedelta
+from PyQt5.QtCore import QAbstractListModel, QDate, QModelIndex, QTime, QTimer, Qt
+from dataclasses import dataclass
+from datetime import date, datetime, time
 
 # -----------------------
 # Helper Functions
 # -----------------------
 def calculate_duration_minutes(start_time, end_time):
-    start_dt = datetime.combine(datetime.today(), start_time)
-    end_dt = datetime.combine(datetime.today(), end_time)
-    if end_time < start_time:
-        end_dt += timedelta(days=1)
-    duration = end_dt - start_dt
-    return int(duration.total_seconds() / 60)
+    # Work in microseconds; QTimeEdit values can carry sub-second parts
+    start_us = ((start_time.hour * 60 + start_time.minute) * 60 + start_time.second) * 1_000_000 + start_time.microsecond
+    end_us = ((end_time.hour * 60 + end_time.minute) * 60 + end_time.second) * 1_000_000 + end_time.microsecond
+    # Modulo wraps appointments that end past midnight
+    return ((end_us - start_us) % 86_400_000_000) // 60_000_000
 
 def calculate_cost(duration_minutes, hourly_rate, time_increment_minutes):
     # Round up to nearest increment for billing
     rounded_minutes = ((duration_minutes + time_increment_minutes - 1) // time_increment_minutes) * time_increment_minutes
     return hourly_rate * (rounded_minutes / 60)
 
+def _format_client_display(data):
+    display = data['name']
+    if data.get('phone'): display += f" • {data['phone']}"
+    if data.get('email'): display += f" • {data['email']}"
+    return display
+
+def _format_appt_display(appt):
+    start = appt.start.strftime("%I:%M %p")
+    end = appt.end.strftime("%I:%M %p")
+    dur = f"{appt.duration} min"
+    cost = f"${appt.cost:.2f}"
+    return f"{appt.date} • {start}-{end} ({dur}) • {cost}"
+
 # -----------------------
 # Data Storage
 # -----------------------
 DATA_DIR = "appts"
 CLIENTS_FILE = os.path.join(DATA_DIR, "clients.json")
-APPTS_FILE = os.path.join(DATA_DIR, "appointments.json")
+# Appointments are stored as an append-only log, one {id: appt} object per line
+APPTS_FILE = os.path.join(DATA_DIR, "appointments.jsonl")
+LEGACY_APPTS_FILE = os.path.join(DATA_DIR, "appointments.json")
 
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
+@dataclass(slots=True)
+class Appt:
+    client_id: str
+    date: str
+    date_obj: date
+    start: time
+    end: time
+    duration: int
+    cost: float
+    # Formatted list row, filled in on first display
+    display: str = ""
+
 clients = {}
 appointments = {}
+# Appointment IDs per client, kept sorted by date
+client_to_appts = defaultdict(list)
+# Date/duration/cost columns per client, parallel to client_to_appts
+client_columns = defaultdict(lambda: {'date': [], 'duration': array('q'), 'cost': array('d')})
+# Running count/duration/cost per client
+client_totals = {}
 client_counter = 1
 appointment_counter = 1
+# Set when clients change; save_data skips the write otherwise
+_dirty = False
+
+def index_appointment(aid):
+    # Returns the position of the appointment in its client's list
+    appt = appointments[aid]
+    cols = client_columns[appt.client_id]
+    pos = bisect_right(cols['date'], appt.date_obj)
+    client_to_appts[appt.client_id].insert(pos, aid)
+    cols['date'].insert(pos, appt.date_obj)
+    cols['duration'].insert(pos, appt.duration)
+    cols['cost'].insert(pos, appt.cost)
+    ct = client_totals.setdefault(appt.client_id, {'count': 0, 'duration': 0, 'cost': 0.0})
+    ct['count'] += 1
+    ct['duration'] += appt.duration
+    ct['cost'] += appt.cost
+    return pos
+
+def build_index():
+    # Index in date order so every insert lands at the end of its client's
+    # columns, instead of shifting them for each out-of-order record
+    client_to_appts.clear()
+    client_columns.clear()
+    client_totals.clear()
+    for aid in sorted(appointments, key=lambda aid: appointments[aid].date_obj):
+        index_appointment(aid)
 
 def load_data():
     global clients, appointments, client_counter, appointment_counter
     # Load clients
     if os.path.exists(CLIENTS_FILE):
-        with open(CLIENTS_FILE, "r") as f:
-            clients.update(json.load(f))
+        clients.update(json.loads(Path(CLIENTS_FILE).read_bytes()))
     # Load appointments
+    appts = {}
+    log_lines = 0
+    needs_compact = False
     if os.path.exists(APPTS_FILE):
-        with open(APPTS_FILE, "r") as f:
-            appts = json.load(f)
-            for k, v in appts.items():
-                # Convert time strings back to time objects
-                v['start'] = datetime.strptime(v['start'], "%H:%M:%S").time()
-                v['end'] = datetime.strptime(v['end'], "%H:%M:%S").time()
-                appointments[k] = v
+        for line in Path(APPTS_FILE).read_bytes().splitlines():
+            if line.strip():
+                appts.update(json.loads(line))
+                log_lines += 1
+        # Later lines supersede earlier ones for the same ID
+        needs_compact = log_lines > len(appts)
+    elif os.path.exists(LEGACY_APPTS_FILE):
+        # Migrate the old single-document format to the log
+        appts = json.loads(Path(LEGACY_APPTS_FILE).read_bytes())
+        needs_compact = bool(appts)
+    for k, v in appts.items():
+        appointments[k] = Appt(
+            client_id=v['client_id'],
+            date=v['date'],
+            # Parse the date once; filtering compares date objects
+            date_obj=datetime.strptime(v['date'], "%Y-%m-%d").date(),
+            # Convert time strings back to time objects
+            start=datetime.strptime(v['start'], "%H:%M:%S").time(),
+            end=datetime.strptime(v['end'], "%H:%M:%S").time(),
+            duration=v['duration'],
+            cost=v['cost'],
+        )
+    build_index()
+    if needs_compact:
+        compact_appointments()
     # Update counters
     if clients:
         client_counter = max(int(cid[1:]) for cid in clients.keys()) + 1
@@ -64,19 +146,106 @@ def load_data():
         appointment_counter = max(int(aid[1:]) for aid in appointments.keys()) + 1
 
 def save_data():
-    # Save clients
+    global _dirty
+    if not _dirty:
+        return
+    # Save clients (appointments are appended to their log as they are added)
     with open(CLIENTS_FILE, "w") as f:
-        json.dump(clients, f, indent=4)
-    # Save appointments
-    to_save = {}
-    for k, v in appointments.items():
-        appt_copy = v.copy()
-        # Convert time objects to strings
-        appt_copy['start'] = appt_copy['start'].strftime("%H:%M:%S")
-        appt_copy['end'] = appt_copy['end'].strftime("%H:%M:%S")
-        to_save[k] = appt_copy
+        f.write(json.dumps(clients))
+    _dirty = False
+
+def _appt_log_line(aid):
+    appt = appointments[aid]
+    # Only persistent fields, with time objects converted to strings
+    record = {
+        "client_id": appt.client_id,
+        "date": appt.date,
+        "start": appt.start.strftime("%H:%M:%S"),
+        "end": appt.end.strftime("%H:%M:%S"),
+        "duration": appt.duration,
+        "cost": appt.cost
+    }
+    return json.dumps({aid: record}) + "\n"
+
+def append_appointment(aid):
+    with open(APPTS_FILE, "a") as f:
+        f.write(_appt_log_line(aid))
+
+def compact_appointments():
+    # Rewrite the log with exactly one line per appointment
     with open(APPTS_FILE, "w") as f:
-        json.dump(to_save, f, indent=4)
+        f.write("".join(_appt_log_line(aid) for aid in appointments))
+
+# -----------------------
+# Stylesheet
+# -----------------------
+# Applied once to the QApplication so every window inherits it
+_STYLESHEET = """
+    QWidget { font-family: 'Segoe UI'; font-size: 11pt; }
+    QLabel { color: #333333; }
+    QLabel#clientLabel { font-size: 16pt; font-weight: bold; }
+    QLabel#totalCostLabel { font-size: 12pt; font-weight: bold; }
+    QLineEdit, QDateEdit, QTimeEdit, QDoubleSpinBox, QSpinBox {
+        padding: 8px; border: 2px solid #e0e0e0; border-radius: 6px; background-color: #fff;
+    }
+    QLineEdit:focus, QDateEdit:focus, QTimeEdit:focus, 
+    QDoubleSpinBox:focus, QSpinBox:focus {
+        border: 2px solid #4a9eff;
+    }
+    QPushButton {
+        padding: 10px 20px; background-color: #4a9eff; color: white; border: none; border-radius: 6px;
+        font-weight: bold; min-height: 35px;
+    }
+    QPushButton:hover { background-color: #3a8eef; }
+    QPushButton:pressed { background-color: #2a7edf; }
+    QListView { border: 2px solid #e0e0e0; border-radius: 6px; background-color: #fff; padding: 5px; }
+    QListView::item { padding: 10px; border-bottom: 1px solid #f0f0f0; }
+    QListView::item:hover { background-color: #f5f5f5; }
+    QListView::item:selected { background-color: #e8f4ff; color: #333; }
+    QGroupBox {
+        font-weight: bold; border: 2px solid #e0e0e0; border-radius: 8px; 
+        margin-top: 10px; padding-top: 15px; background-color: #fafafa;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin; left: 15px; padding: 0 5px;
+    }
+"""
+
+# -----------------------
+# Appointment List Model
+# -----------------------
+class AppointmentListModel(QAbstractListModel):
+    # Holds appointment IDs only; row text is built when the view asks for it,
+    # so rows that are never scrolled into view cost nothing
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        # Called for every painted row and role; rows expose their ID under
+        # UserRole so nothing needs to parse the display text
+        if role == Qt.DisplayRole:
+            # Format on first paint and keep it; appointments never change
+            appt = appointments[self._rows[index.row()]]
+            if not appt.display:
+                appt.display = _format_appt_display(appt)
+            return appt.display
+        if role == Qt.UserRole:
+            return self._rows[index.row()]
+        return None
+
+    def set_rows(self, aids):
+        self.beginResetModel()
+        self._rows = aids
+        self.endResetModel()
+
+    def insert_row(self, pos, aid):
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self._rows.insert(pos, aid)
+        self.endInsertRows()
 
 # -----------------------
 # Main GUI
@@ -86,11 +255,16 @@ class AppointmentTimerApp(QWidget):
         super().__init__()
         self.setWindowTitle("Appointment Timer")
         self.setGeometry(100, 100, 900, 600)
-        self.apply_stylesheet()
 
         # Load data
         load_data()
 
+        # Debounced autosave so bursts of adds coalesce into one write
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(500)
+        self._save_timer.timeout.connect(save_data)
+
         # Stacked widget for pages
         self.pages = QStackedWidget()
         main_layout = QVBoxLayout()
@@ -116,41 +290,19 @@ class AppointmentTimerApp(QWidget):
         self.filter_from = None
         self.filter_to = None
 
+        # Totals for the appointments currently listed
+        self.total_count = 0
+        self.total_duration = 0
+        self.total_cost = 0.0
+
         # Refresh client list on startup
         self.refresh_client_list()
 
-    # -------------------
-    # Stylesheet
-    # -------------------
-    def apply_stylesheet(self):
-        self.setStyleSheet("""
-            QWidget { font-family: 'Segoe UI'; font-size: 11pt; }
-            QLabel { color: #333333; }
-            QLineEdit, QDateEdit, QTimeEdit, QDoubleSpinBox, QSpinBox {
-                padding: 8px; border: 2px solid #e0e0e0; border-radius: 6px; background-color: #fff;
-            }
-            QLineEdit:focus, QDateEdit:focus, QTimeEdit:focus, 
-            QDoubleSpinBox:focus, QSpinBox:focus {
-                border: 2px solid #4a9eff;
-            }
-            QPushButton {
-                padding: 10px 20px; background-color: #4a9eff; color: white; border: none; border-radius: 6px;
-                font-weight: bold; min-height: 35px;
-            }
-            QPushButton:hover { background-color: #3a8eef; }
-            QPushButton:pressed { background-color: #2a7edf; }
-            QListWidget { border: 2px solid #e0e0e0; border-radius: 6px; background-color: #fff; padding: 5px; }
-            QListWidget::item { padding: 10px; border-bottom: 1px solid #f0f0f0; }
-            QListWidget::item:hover { background-color: #f5f5f5; }
-            QListWidget::item:selected { background-color: #e8f4ff; color: #333; }
-            QGroupBox {
-                font-weight: bold; border: 2px solid #e0e0e0; border-radius: 8px; 
-                margin-top: 10px; padding-top: 15px; background-color: #fafafa;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin; left: 15px; padding: 0 5px;
-            }
-        """)
+    def closeEvent(self, event):
+        # Flush any pending changes before exiting
+        self._save_timer.stop()
+        save_data()
+        super().closeEvent(event)
 
     # -------------------
     # Clients Page
@@ -183,15 +335,22 @@ class AppointmentTimerApp(QWidget):
         layout.addStretch()
 
     def refresh_client_list(self):
+        # Suspend repaints while the whole list is rebuilt
+        self.client_list.setUpdatesEnabled(False)
         self.client_list.clear()
-        for cid, data in clients.items():
-            display = data['name']
-            if data.get('phone'): display += f" • {data['phone']}"
-            if data.get('email'): display += f" • {data['email']}"
-            self.client_list.addItem(display)
+        add_item = self.add_client_item
+        for cid in clients:
+            add_item(cid)
+        self.client_list.setUpdatesEnabled(True)
+
+    def add_client_item(self, cid):
+        # Keep the client ID on the item so selection never parses display text
+        item = QListWidgetItem(_format_client_display(clients[cid]))
+        item.setData(Qt.UserRole, cid)
+        self.client_list.addItem(item)
 
     def add_client(self):
-        global client_counter
+        global client_counter, _dirty
         name = self.client_name_input.text().strip()
         phone = self.client_phone_input.text().strip()
         email = self.client_email_input.text().strip()
@@ -201,22 +360,17 @@ class AppointmentTimerApp(QWidget):
         cid = f"c{client_counter}"
         client_counter += 1
         clients[cid] = {"name": name, "phone": phone, "email": email}
+        _dirty = True
         self.client_name_input.clear()
         self.client_phone_input.clear()
         self.client_email_input.clear()
-        self.refresh_client_list()
-        save_data()
+        self.add_client_item(cid)
+        self._save_timer.start()
 
     def open_client_appointments(self, item):
-        # Match by name (first bullet)
-        name = item.text().split(" • ")[0]
-        for cid, data in clients.items():
-            if data['name'] == name:
-                self.current_client_id = cid
-                break
-        if self.current_client_id:
-            self.load_appointments()
-            self.pages.setCurrentWidget(self.appointments_page)
+        self.current_client_id = item.data(Qt.UserRole)
+        self.load_appointments()
+        self.pages.setCurrentWidget(self.appointments_page)
 
     # -------------------
     # Appointments Page
@@ -230,10 +384,7 @@ class AppointmentTimerApp(QWidget):
         # Header with client name and back button
         header_layout = QHBoxLayout()
         self.client_label = QLabel("Appointments for:")
-        label_font = QFont()
-        label_font.setPointSize(16)
-        label_font.setBold(True)
-        self.client_label.setFont(label_font)
+        self.client_label.setObjectName("clientLabel")
         header_layout.addWidget(self.client_label)
         header_layout.addStretch()
         back_btn = QPushButton("← Back to Clients")
@@ -274,10 +425,7 @@ class AppointmentTimerApp(QWidget):
         totals_layout.addWidget(self.total_duration_label)
         totals_layout.addStretch()
         self.total_cost_label = QLabel("Total Cost: $0.00")
-        totals_font = QFont()
-        totals_font.setBold(True)
-        totals_font.setPointSize(12)
-        self.total_cost_label.setFont(totals_font)
+        self.total_cost_label.setObjectName("totalCostLabel")
         totals_layout.addWidget(self.total_cost_label)
         totals_group.setLayout(totals_layout)
         main_layout.addWidget(totals_group)
@@ -285,7 +433,10 @@ class AppointmentTimerApp(QWidget):
         # Appointments list section
         list_group = QGroupBox("Appointments")
         list_layout = QVBoxLayout()
-        self.appt_list = QListWidget()
+        self.appt_model = AppointmentListModel(self)
+        self.appt_list = QListView()
+        self.appt_list.setUniformItemSizes(True)
+        self.appt_list.setModel(self.appt_model)
         list_layout.addWidget(self.appt_list)
         list_group.setLayout(list_layout)
         main_layout.addWidget(list_group)
@@ -352,59 +503,53 @@ class AppointmentTimerApp(QWidget):
         main_layout.addStretch()
 
     def go_back_to_clients(self):
-        self.refresh_client_list()
         self.pages.setCurrentWidget(self.clients_page)
 
     def load_appointments(self):
-        self.appt_list.clear()
-        if not self.current_client_id:
+        cid = self.current_client_id
+        if not cid:
+            self.appt_model.set_rows([])
             # Reset totals when no client selected
-            self.total_appointments_label.setText("Appointments: 0")
-            self.total_duration_label.setText("Total Duration: 0 min")
-            self.total_cost_label.setText("Total Cost: $0.00")
+            self.set_totals(0, 0, 0.0)
             return
-        client_name = clients[self.current_client_id]["name"]
+        client_name = clients[cid]["name"]
         self.client_label.setText(f"Appointments for: {client_name}")
         
-        # Filter and display appointments
-        total_count = 0
-        total_duration = 0
-        total_cost = 0.0
-        
-        for appt in appointments.values():
-            if appt["client_id"] == self.current_client_id:
-                # Apply date filter if active
-                if self.date_filter_active:
-                    appt_date = datetime.strptime(appt['date'], "%Y-%m-%d").date()
-                    if self.filter_from and appt_date < self.filter_from:
-                        continue
-                    if self.filter_to and appt_date > self.filter_to:
-                        continue
-                
-                start = appt['start'].strftime("%I:%M %p")
-                end = appt['end'].strftime("%I:%M %p")
-                dur = f"{appt['duration']} min"
-                cost = f"${appt['cost']:.2f}"
-                self.appt_list.addItem(f"{appt['date']} • {start}-{end} ({dur}) • {cost}")
-                
-                # Calculate totals
-                total_count += 1
-                total_duration += appt['duration']
-                total_cost += appt['cost']
-        
-        # Update totals display
-        self.total_appointments_label.setText(f"Appointments: {total_count}")
-        self.total_duration_label.setText(f"Total Duration: {total_duration} min")
-        self.total_cost_label.setText(f"Total Cost: ${total_cost:.2f}")
+        # Filter and display appointments; the model gets its own copy of
+        # the IDs since the index is updated separately on add
+        aids = client_to_appts[cid]
+        if self.date_filter_active:
+            cols = client_columns[cid]
+            lo = bisect_left(cols['date'], self.filter_from)
+            # Clamp so an empty range can never yield a negative count
+            hi = max(bisect_right(cols['date'], self.filter_to), lo)
+            self.appt_model.set_rows(aids[lo:hi])
+            # Sum the filtered range straight off the typed columns
+            self.set_totals(hi - lo, sum(cols['duration'][lo:hi]), sum(cols['cost'][lo:hi]))
+        else:
+            self.appt_model.set_rows(list(aids))
+            ct = client_totals.get(cid, {'count': 0, 'duration': 0, 'cost': 0.0})
+            self.set_totals(ct['count'], ct['duration'], ct['cost'])
+
+    def set_totals(self, count, duration, cost):
+        self.total_count = count
+        self.total_duration = duration
+        self.total_cost = cost
+        self.total_appointments_label.setText(f"Appointments: {count}")
+        self.total_duration_label.setText(f"Total Duration: {duration} min")
+        self.total_cost_label.setText(f"Total Cost: ${cost:.2f}")
     
     def apply_date_filter(self):
-        self.filter_from = self.filter_from_date.date().toPyDate()
-        self.filter_to = self.filter_to_date.date().toPyDate()
+        filter_from = self.filter_from_date.date().toPyDate()
+        filter_to = self.filter_to_date.date().toPyDate()
         
-        if self.filter_from > self.filter_to:
+        # Validate before storing so a rejected range keeps the active filter
+        if filter_from > filter_to:
             QMessageBox.warning(self, "Error", "From date must be before or equal to To date")
             return
         
+        self.filter_from = filter_from
+        self.filter_to = filter_to
         self.date_filter_active = True
         self.load_appointments()
     
@@ -421,7 +566,7 @@ class AppointmentTimerApp(QWidget):
         if not self.current_client_id:
             QMessageBox.warning(self, "Error", "No client selected")
             return
-        date_str = self.appt_date.date().toString("yyyy-MM-dd")
+        appt_date = self.appt_date.date().toPyDate()
         start_time = self.appt_start.time().toPyTime()
         end_time = self.appt_end.time().toPyTime()
         rate = self.rate_input.value()
@@ -431,22 +576,32 @@ class AppointmentTimerApp(QWidget):
 
         aid = f"a{appointment_counter}"
         appointment_counter += 1
-        appointments[aid] = {
-            "client_id": self.current_client_id,
-            "date": date_str,
-            "start": start_time,
-            "end": end_time,
-            "duration": duration,
-            "cost": cost
-        }
-        self.load_appointments()
-        save_data()
+        appointments[aid] = Appt(
+            client_id=self.current_client_id,
+            date=appt_date.strftime("%Y-%m-%d"),
+            date_obj=appt_date,
+            start=start_time,
+            end=end_time,
+            duration=duration,
+            cost=cost,
+        )
+        pos = index_appointment(aid)
+        append_appointment(aid)
+
+        # Show just the new row if it passes the current filter
+        if self.date_filter_active:
+            if not self.filter_from <= appt_date <= self.filter_to:
+                return
+            pos -= bisect_left(client_columns[self.current_client_id]['date'], self.filter_from)
+        self.appt_model.insert_row(pos, aid)
+        self.set_totals(self.total_count + 1, self.total_duration + duration, self.total_cost + cost)
 
 # -----------------------
 # Run App
 # -----------------------
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.setStyleSheet(_STYLESHEET)
     window = AppointmentTimerApp()
     window.show()
     sys.exit(app.exec_())